@@ -1,10 +1,48 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import plotly.io as pio
 import io
+import os
+import time
+import hashlib
+import xlsxwriter
 from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from pandas.tseries.api import guess_datetime_format
+
+try:
+    import polars as pl
+except ImportError:  # optional: faster ingest when installed
+    pl = None
+
+try:
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = "orjson"  # much faster figure serialization
+except ImportError:  # plotly falls back to the stdlib json encoder
+    pass
+
+def env_number(name, default, cast):
+    """Read a non-negative number from the environment, falling back to ``default`` if unset or malformed"""
+    try:
+        value = cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+# Parquet side-cache of cleaned uploads (it holds recipient emails and
+# subjects). SENDGRID_CACHE_DIR="" turns it off; old files are pruned by
+# count and age after every write.
+CACHE_DIR = os.environ.get("SENDGRID_CACHE_DIR", "cache")
+CACHE_MAX_FILES = env_number("SENDGRID_CACHE_MAX_FILES", 20, int)
+CACHE_MAX_AGE_DAYS = env_number("SENDGRID_CACHE_MAX_AGE_DAYS", 7.0, float)
+# Bump CACHE_VERSION whenever the cleaned frame's layout changes
+CACHE_VERSION = 5
+EXCEL_MAX_ROWS = 1_048_576  # xlsx sheet limit, header row included
 
 # Page configuration
 st.set_page_config(
@@ -69,26 +107,425 @@ with st.sidebar:
             st.stop()
         st.success("✅ File uploaded successfully!")
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_and_clean(file_bytes):
+    """Parse and clean the uploaded SendGrid CSV (cached on the file bytes)
+
+    The file digest is kept in ``df.attrs["file_digest"]`` so the derived
+    caches below can be keyed on it instead of re-hashing large frames.
+    """
+    # Cleaned frames are also persisted as Parquet keyed on the file hash, so
+    # re-uploading a file in a later session skips the whole pipeline
+    file_digest = hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
+    cache_dir = Path(CACHE_DIR) if CACHE_DIR else None
+    cache_path = cache_dir / f"v{CACHE_VERSION}-{file_digest}.parquet" if cache_dir is not None else None
+    if cache_dir is not None:
+        prune_cache(cache_dir)
+    if cache_path is not None and cache_path.exists():
+        df = pd.read_parquet(cache_path, memory_map=True)
+        df.attrs["file_digest"] = file_digest
+        return df
+
+    if pl is not None:
+        try:
+            df = clean_with_polars(file_bytes)
+        except pl.exceptions.PolarsError:  # e.g. malformed rows pandas tolerates
+            df = clean_with_pandas(file_bytes)
+    else:
+        df = clean_with_pandas(file_bytes)
+
+    # Low-cardinality text columns are cheaper to hash and store as categories
+    for col in ["subject", "email"]:
+        if col in df.columns and df[col].nunique() < len(df) // 2:
+            df[col] = df[col].astype("category")
+
+    # Keep each row's position in the CSV so the raw export can pick the
+    # full original rows back out of the file
+    df["source_row"] = df.index.to_numpy(dtype=np.int64)
+
+    # Sort by date and index on it (unnamed, so the column stays unambiguous)
+    # so date-range filters are index slices instead of full-column scans
+    df = df.sort_values("processed_date", kind="stable")
+    df = df.set_index(df["processed_date"].rename(None))
+
+    if cache_path is not None:
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            df.to_parquet(tmp_path, compression="zstd")
+            tmp_path.replace(cache_path)
+        except OSError:
+            pass  # the disk cache is best effort; the in-memory cache still applies
+        prune_cache(cache_dir)
+
+    df.attrs["file_digest"] = file_digest
+    return df
+
+def prune_cache(cache_dir):
+    """Delete side-cache files from older cache versions, past the age limit, or beyond the newest CACHE_MAX_FILES"""
+    try:
+        entries = [(path, path.stat().st_mtime) for path in cache_dir.iterdir() if path.is_file()]
+    except OSError:
+        return  # no cache directory yet
+
+    cutoff = time.time() - CACHE_MAX_AGE_DAYS * 86400
+    current_prefix = f"v{CACHE_VERSION}-"
+    keep = []
+    stale = []
+    for path, mtime in entries:
+        if path.suffix == ".parquet":
+            if path.name.startswith(current_prefix) and mtime >= cutoff:
+                keep.append((path, mtime))
+            else:
+                stale.append(path)
+        elif path.suffix == ".tmp" and mtime < cutoff:
+            stale.append(path)  # abandoned partial write (fresh ones belong to a running writer)
+    keep.sort(key=lambda entry: entry[1], reverse=True)
+    stale.extend(path for path, _ in keep[CACHE_MAX_FILES:])
+
+    for path in stale:
+        try:
+            path.unlink()
+        except OSError:
+            pass  # already gone, or removed by another session
+
+# Columns the dashboard reads from the CSV, and the dtypes both readers use
+USED_COLUMNS = ["event", "message_id", "processed", "subject", "email"]
+READ_DTYPES = {"event": "category", "message_id": "string", "processed": "string", "subject": "string", "email": "string"}
+VALID_EVENTS = ["processed", "delivered", "open", "bounce"]
+
+def parse_processed(values):
+    """Parse processed timestamps like pd.to_datetime(errors='coerce') infers them
+
+    The format is guessed from the first value, as pandas does, but passed
+    explicitly so files pandas can't guess a format for are parsed per value
+    without its "Could not infer format" warning. Mixed UTC offsets can only
+    be held in UTC, so those files are converted to it.
+    """
+    first = values.dropna()
+    first = first[first.str.strip() != ""]
+    fmt = guess_datetime_format(first.iloc[0]) if len(first) else None
+    try:
+        return pd.to_datetime(values, format=fmt or "mixed", errors='coerce')
+    except ValueError:  # mixed UTC offsets
+        return pd.to_datetime(values, format=fmt or "mixed", errors='coerce', utc=True)
+
+def clean_with_polars(file_bytes):
+    """Read and event-filter the CSV in one lazy, multi-threaded Polars query, then finish in pandas
+
+    Only the read, the column selection and the event filter run in Polars;
+    the rest is the pandas path's clean_events, so both paths return equal
+    frames (the index holds each row's position in the CSV, as with pandas).
+    """
+    lf = pl.scan_csv(io.BytesIO(file_bytes), infer_schema=False).with_row_index("__row")
+
+    # Clean column names
+    lf = lf.rename({col: col.strip() for col in lf.collect_schema().names()})
+    columns = lf.collect_schema().names()
+
+    # Data validation
+    required_columns = ["event", "message_id", "processed"]
+    missing = [col for col in required_columns if col not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    # Only read the columns the dashboard uses, and only rows of relevant events
+    lf = (
+        lf.select(["__row"] + [col for col in columns if col in USED_COLUMNS])
+        .filter(pl.col("event").is_in(VALID_EVENTS))
+    )
+
+    # The streaming engine runs the scan in batches across all cores, so
+    # peak memory stays well below the size of the parsed CSV
+    df = lf.collect(engine="streaming").to_pandas(use_pyarrow_extension_array=True)
+    df.index = pd.Index(df.pop("__row").to_numpy(dtype=np.int64))
+    df = df.astype({col: READ_DTYPES[col] for col in df.columns})
+    return clean_events(df)
+
+def clean_with_pandas(file_bytes):
+    """Run the ingest pipeline with pandas (used when Polars is not installed or can't read the file)"""
+    # Chunking for jumbo CSVs (friendlier to RAM)
+    CHUNK_THRESHOLD_MB = 200
+    CHUNK_SIZE = 200_000
+
+    use_chunks = len(file_bytes) > CHUNK_THRESHOLD_MB * 500 * 500
+
+    # Only read the columns the dashboard uses, with narrow dtypes
+    header = pd.read_csv(io.BytesIO(file_bytes), nrows=0).columns
+    usecols = [col for col in header if col.strip() in USED_COLUMNS]
+    read_kwargs = dict(
+        usecols=usecols,
+        dtype={col: READ_DTYPES[col.strip()] for col in usecols},
+        dtype_backend="pyarrow"
+    )
+
+    if use_chunks:
+        # The pyarrow engine has no chunked reader
+        df_iter = pd.read_csv(io.BytesIO(file_bytes), chunksize=CHUNK_SIZE, **read_kwargs)
+        df = pd.concat(df_iter, ignore_index=True)
+    else:
+        df = pd.read_csv(io.BytesIO(file_bytes), engine="pyarrow", **read_kwargs)
+
+    # Clean column names
+    df.columns = df.columns.str.strip()
+
+    # Data validation
+    required_columns = ["event", "message_id", "processed"]
+    missing = [col for col in required_columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    return clean_events(df)
+
+def clean_events(df):
+    """Clean the events read by either reader (index = row position in the CSV)"""
+    # Ensure optional columns exist
+    if "subject" not in df.columns:
+        df["subject"] = pd.Series(pd.NA, index=df.index, dtype="string")
+
+    # Keep only relevant events
+    df = df[df["event"].isin(VALID_EVENTS)]
+    df["event"] = df["event"].astype(pd.CategoricalDtype(VALID_EVENTS))
+
+    # Encode message ids once (after any chunk concat, which would drop a
+    # per-chunk category dtype) so later groupbys hash integer codes
+    df["message_id"] = df["message_id"].astype("category")
+
+    # Process datetime
+    df = df.rename(columns={"processed": "processed_datetime"})
+    df["processed_datetime"] = parse_processed(df["processed_datetime"])
+    df = df.dropna(subset=["processed_datetime"])
+    # Day-floored into an Arrow date32 (int32 days) rather than an object
+    # column of Python date instances
+    df["processed_date"] = df["processed_datetime"].dt.floor("D").astype("date32[pyarrow]")
+
+    # Keep messages that have a processed event: flag the category codes seen
+    # on processed rows, then look each row's code up (the extra slot holds
+    # the -1 code of missing ids, so they group together like isin would)
+    codes = df["message_id"].cat.codes.to_numpy()
+    code_processed = np.zeros(len(df["message_id"].cat.categories) + 1, dtype=bool)
+    code_processed[codes[(df["event"] == "processed").to_numpy()]] = True
+    df = df[code_processed[codes]]
+
+    # Remove duplicate events per message per date
+    df = df.drop_duplicates(subset=["message_id", "event", "processed_date"])
+
+    # Get subjects
+    processed_df = (
+        df[df["event"] == "processed"][["message_id", "subject"]]
+        .drop_duplicates(subset=["message_id"])
+    )
+    df["subject"] = df["message_id"].map(processed_df.set_index("message_id")["subject"])
+
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def sorted_unique(_df, file_digest, column):
+    """Sorted distinct non-null values of a column (sorted in pandas, not Python), cached on the file"""
+    return _df[column].dropna().drop_duplicates().sort_values().tolist()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def filter_frame(_df, file_digest, subjects, excluded):
+    """Apply the subject and email-exclusion filters, cached on the file and selections"""
+    df_ = _df
+    # Subject filter (if none selected, show none; None means every subject is selected)
+    if subjects is None:
+        mask = df_["subject"].notna().to_numpy()
+    elif subjects:
+        mask = df_["subject"].isin(subjects).to_numpy()
+    else:
+        mask = df_["subject"].isna().to_numpy()
+
+    # Email exclusion filter, combined into the same mask so the frame is indexed once
+    if excluded and "email" in df_.columns:
+        mask = mask & ~df_["email"].isin(excluded).to_numpy()
+
+    return df_[mask]
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def event_flags(_df, selection_key):
+    """Build one row per (processed_date, message_id) with a boolean flag for each event it has
+
+    ``selection_key`` identifies the file and filters that produced ``_df``; Streamlit
+    would otherwise hash (a sample of) the frame on every rerun.
+    """
+    df_ = _df
+    return (
+        df_.groupby(["processed_date", "message_id", "event"], observed=True).size()
+        .unstack(fill_value=0)
+        .reindex(columns=["processed", "delivered", "open", "bounce"], fill_value=0)
+        .astype(bool)
+    )
+
+def count_events(flags):
+    """Count processed, delivered, opened and bounced messages from event flags"""
+    processed = flags["processed"]
+    delivered = flags["delivered"]
+    # The ANDs are not redundant: a date-filtered frame can hold a delivered/open/bounce
+    # event for a message whose processed event fell outside the range
+    return (
+        int(processed.sum()),
+        int((delivered & processed).sum()),
+        int((flags["open"] & delivered).sum()),
+        int((flags["bounce"] & processed).sum())
+    )
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def daily_pivot(_flags, filter_key):
+    """Build the per-day unique message counts and rates from the event flags"""
+    flags = _flags
+    # Per-date totals: one bincount per event over the integer date codes of the flag index
+    # (a date-sliced frame keeps every date in its levels, so drop the unused ones first)
+    index = flags.index.remove_unused_levels()
+    dates = index.levels[0]
+    date_codes = index.codes[0]
+    pivot = pd.DataFrame({
+        event: np.bincount(date_codes, weights=flags[event].to_numpy(), minlength=len(dates)).astype(np.int64)
+        for event in flags.columns
+    })
+    pivot.insert(0, "processed_date", dates)
+
+    # Calculate rates (vectorized; zero denominators give a 0% rate)
+    p = pivot["processed"].to_numpy(dtype=float)
+    d = pivot["delivered"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pivot["Delivery Rate (%)"] = np.where(p > 0, d / p * 100, 0.0)
+        pivot["Open Rate (%)"] = np.where(d > 0, pivot["open"].to_numpy(dtype=float) / d * 100, 0.0)
+        pivot["Bounce Rate (%)"] = np.where(p > 0, pivot["bounce"].to_numpy(dtype=float) / p * 100, 0.0)
+
+    return pivot
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def daily_funnel(_flags, filter_key):
+    """Per-day count_events() totals (indexed by date) for the drilldown lookups"""
+    flags = _flags
+    index = flags.index.remove_unused_levels()
+    processed = flags["processed"].to_numpy()
+    delivered = flags["delivered"].to_numpy()
+    funnel = {
+        "processed": processed,
+        "delivered": delivered & processed,
+        "open": flags["open"].to_numpy() & delivered,
+        "bounce": flags["bounce"].to_numpy() & processed
+    }
+    return pd.DataFrame(
+        {event: np.bincount(index.codes[0], weights=mask, minlength=len(index.levels[0])).astype(np.int64)
+         for event, mask in funnel.items()},
+        index=index.levels[0]
+    )
+
+def frame_digest(df_):
+    """Hash every row (st.cache_data only samples rows of large frames) plus the headers"""
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(df_, index=True).to_numpy().tobytes(), digest_size=16)
+    digest.update("\x1f".join(map(str, df_.columns)).encode())
+    return digest.hexdigest()
+
 def to_excel(df_):
-    """Convert DataFrame to Excel format for download"""
+    """Convert DataFrame to Excel format for download (memoized on the frame's content)"""
+    return build_excel(frame_digest(df_), df_)
+
+def to_csv(df_):
+    """Convert DataFrame to CSV for download (memoized on the frame's content)"""
+    return build_csv(frame_digest(df_), df_)
+
+def raw_export(file_bytes, df_):
+    """Rebuild the full rows of the uploaded CSV for the rows kept in ``df_``
+
+    The cleaned frame only holds the columns the dashboard uses, so the file
+    is re-read in full here, when a raw export is actually downloaded. The
+    cleaned columns are added after the file's own ones, and ``subject`` is
+    overwritten with the subject of the message's processed event.
+    """
+    CHUNK_THRESHOLD_MB = 200
+    CHUNK_SIZE = 200_000
+
+    if len(file_bytes) > CHUNK_THRESHOLD_MB * 500 * 500:
+        raw = pd.concat(pd.read_csv(io.BytesIO(file_bytes), chunksize=CHUNK_SIZE), ignore_index=True)
+    else:
+        raw = pd.read_csv(io.BytesIO(file_bytes))
+    raw.columns = raw.columns.str.strip()
+
+    # Back in file order
+    df_ = df_.sort_values("source_row")
+    raw = raw.iloc[df_["source_row"].to_numpy()].reset_index(drop=True)
+    subject = df_["subject"].astype(object).to_numpy()
+    raw["subject"] = subject
+    raw["processed_datetime"] = df_["processed_datetime"].to_numpy()
+    raw["processed_date"] = df_["processed_date"].to_numpy()
+    raw["unique_event"] = (
+        df_["message_id"].astype(str).to_numpy() + "_" + df_["event"].astype(str).to_numpy()
+        + "_" + df_["processed_date"].astype(str).to_numpy()
+    )
+    raw["subject_processed"] = subject
+    return raw
+
+def raw_to_excel(file_bytes, df_):
+    """Raw export of ``df_`` as xlsx (see raw_export)"""
+    return to_excel(raw_export(file_bytes, df_))
+
+def raw_to_csv(file_bytes, df_):
+    """Raw export of ``df_`` as CSV (see raw_export)"""
+    return to_csv(raw_export(file_bytes, df_))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_csv(key, _df):
+    """Serialize a DataFrame to CSV bytes; much faster than xlsx for large raw exports"""
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df_.to_excel(writer, index=False, sheet_name='Email_Rates')
-        workbook = writer.book
-        worksheet = writer.sheets['Email_Rates']
-        
-        # Add formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'text_wrap': True,
-            'valign': 'top',
-            'fg_color': '#D7E4BC',
-            'border': 1
-        })
-        
-        for col_num, value in enumerate(df_.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            
+    _df.to_csv(output, index=False, chunksize=100_000)
+    return output.getvalue()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_excel(key, _df):
+    """Serialize a DataFrame to xlsx bytes; cached on ``key``, the frame itself is not hashed
+
+    Raises ValueError if the frame doesn't fit on one sheet, or if a value can't
+    be written, rather than returning a workbook that silently lacks rows.
+    """
+    df_ = _df
+    if len(df_) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"{len(df_):,} rows don't fit in an Excel sheet ({EXCEL_MAX_ROWS - 1:,} rows max); use the CSV export"
+        )
+    output = io.BytesIO()
+    # constant_memory streams each row out as soon as the next one starts, so
+    # everything (header included) is written strictly top to bottom
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'use_zip64': True,  # large raw exports can exceed the 4 GB zip limit
+        'default_date_format': 'yyyy-mm-dd',
+        'remove_timezone': True,
+        'nan_inf_to_errors': True
+    })
+    worksheet = workbook.add_worksheet('Email_Rates')
+    
+    # Add formatting
+    header_format = workbook.add_format({
+        'bold': True,
+        'text_wrap': True,
+        'valign': 'top',
+        'fg_color': '#D7E4BC',
+        'border': 1
+    })
+    datetime_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+    
+    # The write methods return a negative code instead of raising (e.g. -1 out
+    # of range, -2 for strings over Excel's 32,767 characters)
+    def check(error, row_num):
+        if error:
+            workbook.close()
+            raise ValueError(f"Could not write row {row_num} to Excel (xlsxwriter error {error}); use the CSV export")
+
+    check(worksheet.write_row(0, 0, [str(col) for col in df_.columns], header_format), 0)
+    for row_num, row in enumerate(df_.itertuples(index=False, name=None), start=1):
+        for col_num, value in enumerate(row):
+            if pd.isna(value):
+                continue
+            if isinstance(value, datetime):
+                check(worksheet.write_datetime(row_num, col_num, value, datetime_format), row_num)
+            else:
+                check(worksheet.write(row_num, col_num, value), row_num)
+    
+    workbook.close()
     return output.getvalue()
 
 def create_rate_chart(processed, delivered, opened, bounced, title="Email Performance"):
@@ -157,59 +594,18 @@ def display_metric_cards(processed, delivered, opened, bounced):
 if uploaded_file is not None:
     # Load and process data
     with st.spinner("🔄 Processing your data..."):
-        # Chunking for jumbo CSVs (friendlier to RAM)
-        CHUNK_THRESHOLD_MB = 200
-        CHUNK_SIZE = 200_000
-
-        size_bytes = getattr(uploaded_file, "size", None)
-        use_chunks = size_bytes is not None and size_bytes > CHUNK_THRESHOLD_MB * 500 * 500
-
-        if use_chunks:
-            df_iter = pd.read_csv(uploaded_file, chunksize=CHUNK_SIZE)
-            df = pd.concat(df_iter, ignore_index=True)
-        else:
-            df = pd.read_csv(uploaded_file)
-
-        # Clean column names
-        df.columns = df.columns.str.strip()
-
-        # Data validation
-        required_columns = ["event", "message_id", "processed"]
-        missing = [col for col in required_columns if col not in df.columns]
-        if missing:
-            st.error(f"❌ Missing required columns: {missing}")
+        try:
+            file_bytes = uploaded_file.getvalue()
+            df = load_and_clean(file_bytes)
+        except ValueError as e:
+            st.error(f"❌ {e}")
             st.stop()
 
-        # Ensure optional columns exist
-        if "subject" not in df.columns:
-            df["subject"] = None
-
-        # Keep only relevant events
-        valid_events = ["processed", "delivered", "open", "bounce"]
-        df = df[df["event"].isin(valid_events)]
-
-        # Process datetime
-        df["processed_datetime"] = pd.to_datetime(df["processed"], errors='coerce')
-        df = df.dropna(subset=["processed_datetime"])
-        df["processed_date"] = df["processed_datetime"].dt.date
-
-        # Find processed message IDs
-        processed_ids = set(df.loc[df["event"] == "processed", "message_id"].unique())
-        df = df[df["message_id"].isin(processed_ids)]
-
-        # Remove duplicates
-        df["unique_event"] = (
-            df["message_id"].astype(str) + "_" + df["event"] + "_" + df["processed_date"].astype(str)
-        )
-        df = df.drop_duplicates(subset=["unique_event"])
-
-        # Get subjects
-        processed_df = (
-            df[df["event"] == "processed"][["message_id", "subject"]]
-            .drop_duplicates(subset=["message_id"])
-        )
-        df = df.merge(processed_df, on="message_id", how="left", suffixes=('', '_processed'))
-        df["subject"] = df["subject_processed"]
+    # Email exclusions only apply to the file they were picked from
+    if st.session_state.get("excluded_emails_digest") != df.attrs["file_digest"]:
+        st.session_state.pop("excluded_emails", None)
+        st.session_state.pop("excluded_emails_widget", None)
+        st.session_state["excluded_emails_digest"] = df.attrs["file_digest"]
 
     # Sidebar filters
     with st.sidebar:
@@ -228,7 +624,7 @@ if uploaded_file is not None:
         )
         
         # Subject filter
-        unique_subjects = sorted(df["subject"].dropna().unique())
+        unique_subjects = sorted_unique(df, df.attrs["file_digest"], "subject")
         if len(unique_subjects) > 1:
             selected_subjects = st.multiselect(
                 "📧 Email Subjects",
@@ -240,53 +636,61 @@ if uploaded_file is not None:
             selected_subjects = unique_subjects
             
         # Email exclusion filter
-        unique_emails = sorted(df["email"].dropna().unique()) if "email" in df.columns else []
-        excluded_emails = []
-        
-        if unique_emails:
-            with st.expander("🚫 Exclude Specific Emails"):
-                excluded_emails = st.multiselect(
-                    "Select emails to exclude from analysis",
-                    options=unique_emails,
-                    help="Exclude specific email addresses from the analysis"
-                )
+        # The (possibly huge) address list is only built and sent to the browser
+        # while the expander is open; the selection lives in session state so it
+        # keeps applying once the expander is collapsed again
+        if "email" in df.columns and df["email"].notna().any():
+            email_expander = st.expander("🚫 Exclude Specific Emails", key="email_expander", on_change="rerun")
+            with email_expander:
+                if email_expander.open:
+                    unique_emails = sorted_unique(df, df.attrs["file_digest"], "email")
+                    known_emails = set(unique_emails)
+                    st.multiselect(
+                        "Select emails to exclude from analysis",
+                        options=unique_emails,
+                        default=[email for email in st.session_state.get("excluded_emails", []) if email in known_emails],
+                        key="excluded_emails_widget",
+                        on_change=lambda: st.session_state.update(excluded_emails=st.session_state["excluded_emails_widget"]),
+                        help="Exclude specific email addresses from the analysis"
+                    )
+            excluded_emails = st.session_state.get("excluded_emails", [])
+        else:
+            excluded_emails = []
 
-    # Apply filters
-    df_filtered = df.copy()
-    
-    # Date filter
+    # Apply filters (subject/email filtering is cached, so date changes skip it)
+    file_digest = df.attrs["file_digest"]
+    # The default all-subjects selection is keyed as None, which skips the isin lookup
+    all_subjects = bool(selected_subjects) and len(selected_subjects) == len(unique_subjects)
+    selection_key = (file_digest, None if all_subjects else tuple(selected_subjects), tuple(excluded_emails))
+    df_filtered = filter_frame(df, *selection_key)
+
+    # Per-day, per-message event flags shared by all tabs, built before the
+    # date filter so moving the range only slices this much smaller frame
+    flags = event_flags(df_filtered, selection_key)
+
+    # Date filter (both frames are sorted by date, so these are index slices)
     if isinstance(date_range, tuple) and len(date_range) == 2:
         start_date, end_date = date_range
-        mask = (df_filtered["processed_date"] >= start_date) & (df_filtered["processed_date"] <= end_date)
-        df_filtered = df_filtered[mask]
-    
-    # Subject filter
-    if selected_subjects:
-        df_filtered = df_filtered[df_filtered["subject"].isin(selected_subjects)]
-    else:
-        df_filtered = df_filtered[df_filtered["subject"].isna()]  # if none selected, show none
-
-    # Email exclusion filter
-    if excluded_emails:
-        df_filtered = df_filtered[~df_filtered["email"].isin(excluded_emails)]
+        df_filtered = df_filtered.loc[start_date:end_date]
+        flags = flags.loc[start_date:end_date]
+    filter_key = selection_key + (tuple(date_range) if isinstance(date_range, tuple) else date_range,)
 
     # Main dashboard tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "📈 Daily Trends", "🔍 Date Drilldown", "📥 Downloads"])
+    # Switching tabs reruns the script, so only the open tab does its (heavy) work
+    tab1, tab2, tab3, tab4 = st.tabs(
+        ["📊 Overview", "📈 Daily Trends", "🔍 Date Drilldown", "📥 Downloads"],
+        key="main_tabs",
+        on_change="rerun"
+    )
 
     # Tab 1: Overview
     with tab1:
         st.header("📊 Email Performance Overview")
         
-        # Calculate overall metrics
-        processed_set = set(df_filtered[df_filtered["event"] == "processed"]["message_id"].unique())
-        delivered_set = set(df_filtered[df_filtered["event"] == "delivered"]["message_id"].unique())
-        open_set = set(df_filtered[df_filtered["event"] == "open"]["message_id"].unique())
-        bounce_set = set(df_filtered[df_filtered["event"] == "bounce"]["message_id"].unique())
-
-        total_processed = len(processed_set)
-        total_delivered = len(delivered_set.intersection(processed_set))
-        total_open = len(open_set.intersection(delivered_set))
-        total_bounce = len(bounce_set.intersection(processed_set))
+        # Calculate overall metrics (a message counts once across all its dates)
+        total_processed, total_delivered, total_open, total_bounce = count_events(
+            flags.groupby(level="message_id").any()
+        )
 
         if total_processed > 0:
             # Display metric cards
@@ -335,33 +739,13 @@ if uploaded_file is not None:
     with tab2:
         st.header("📈 Daily Email Performance Trends")
         
-        if total_processed > 0:
+        if not tab2.open:
+            pass
+        elif total_processed > 0:
             # Create daily pivot
-            pivot = df_filtered.pivot_table(
-                index="processed_date",
-                columns="event",
-                values="message_id",
-                aggfunc=lambda x: x.nunique(),
-                fill_value=0
-            ).reset_index().sort_values("processed_date")
-
-            # Ensure all columns exist
-            for col in ["processed", "delivered", "open", "bounce"]:
-                if col not in pivot.columns:
-                    pivot[col] = 0
-
-            # Calculate rates
-            pivot["Delivery Rate (%)"] = pivot.apply(
-                lambda row: (row["delivered"] / row["processed"] * 100) if row["processed"] else 0, axis=1
-            )
-            pivot["Open Rate (%)"] = pivot.apply(
-                lambda row: (row["open"] / row["delivered"] * 100) if row["delivered"] else 0, axis=1
-            )
-            pivot["Bounce Rate (%)"] = pivot.apply(
-                lambda row: (row["bounce"] / row["processed"] * 100) if row["processed"] else 0, axis=1
-            )
+            pivot = daily_pivot(flags, filter_key)
 
-            # Time series charts
+            # Time series charts (WebGL traces stay responsive on multi-year, per-day data)
             fig = make_subplots(
                 rows=2, cols=2,
                 subplot_titles=('Email Volume Over Time', 'Delivery Rate Trend', 'Open Rate Trend', 'Bounce Rate Trend'),
@@ -371,37 +755,41 @@ if uploaded_file is not None:
 
             # Volume chart
             fig.add_trace(
-                go.Scatter(x=pivot["processed_date"], y=pivot["processed"], name="Processed", line=dict(color='#1f77b4')),
+                go.Scattergl(x=pivot["processed_date"], y=pivot["processed"], name="Processed", line=dict(color='#1f77b4')),
                 row=1, col=1
             )
             fig.add_trace(
-                go.Scatter(x=pivot["processed_date"], y=pivot["delivered"], name="Delivered", line=dict(color='#28a745')),
+                go.Scattergl(x=pivot["processed_date"], y=pivot["delivered"], name="Delivered", line=dict(color='#28a745')),
                 row=1, col=1
             )
 
             # Rate charts
             fig.add_trace(
-                go.Scatter(x=pivot["processed_date"], y=pivot["Delivery Rate (%)"], name="Delivery Rate", line=dict(color='#28a745')),
+                go.Scattergl(x=pivot["processed_date"], y=pivot["Delivery Rate (%)"], name="Delivery Rate", line=dict(color='#28a745')),
                 row=1, col=2
             )
             fig.add_trace(
-                go.Scatter(x=pivot["processed_date"], y=pivot["Open Rate (%)"], name="Open Rate", line=dict(color='#17a2b8')),
+                go.Scattergl(x=pivot["processed_date"], y=pivot["Open Rate (%)"], name="Open Rate", line=dict(color='#17a2b8')),
                 row=2, col=1
             )
             fig.add_trace(
-                go.Scatter(x=pivot["processed_date"], y=pivot["Bounce Rate (%)"], name="Bounce Rate", line=dict(color='#dc3545')),
+                go.Scattergl(x=pivot["processed_date"], y=pivot["Bounce Rate (%)"], name="Bounce Rate", line=dict(color='#dc3545')),
                 row=2, col=2
             )
 
             fig.update_layout(height=600, showlegend=False, title_text="Email Performance Trends")
             st.plotly_chart(fig, use_container_width=True)
 
-            # Data table
+            # Data table (capped, so multi-year exports don't ship every row to the browser)
+            MAX_TABLE_DAYS = 365
             st.subheader("📋 Daily Performance Data")
             st.dataframe(
-                pivot.round(2),
-                use_container_width=True
+                pivot.tail(MAX_TABLE_DAYS).round(2),
+                use_container_width=True,
+                height=400
             )
+            if len(pivot) > MAX_TABLE_DAYS:
+                st.caption(f"Showing the last {MAX_TABLE_DAYS} days — use the Downloads tab for the full daily export.")
         else:
             st.warning("⚠️ No data available for trends analysis.")
 
@@ -409,8 +797,12 @@ if uploaded_file is not None:
     with tab3:
         st.header("🔍 Date-Specific Analysis")
         
-        if total_processed > 0:
-            available_dates = sorted(df_filtered["processed_date"].unique(), reverse=True)
+        if not tab3.open:
+            pass
+        elif total_processed > 0:
+            # Per-day funnel counts are cached, so changing the date is a row lookup
+            funnel = daily_funnel(flags, filter_key)
+            available_dates = funnel.index[::-1].tolist()
             
             col1, col2 = st.columns([1, 2])
             
@@ -423,18 +815,10 @@ if uploaded_file is not None:
                 )
             
             if selected_date:
-                df_date = df_filtered[df_filtered["processed_date"] == selected_date]
-                
                 # Calculate date-specific metrics
-                processed_set_date = set(df_date[df_date["event"] == "processed"]["message_id"].unique())
-                delivered_set_date = set(df_date[df_date["event"] == "delivered"]["message_id"].unique())
-                open_set_date = set(df_date[df_date["event"] == "open"]["message_id"].unique())
-                bounce_set_date = set(df_date[df_date["event"] == "bounce"]["message_id"].unique())
-
-                total_processed_date = len(processed_set_date)
-                total_delivered_date = len(delivered_set_date.intersection(processed_set_date))
-                total_open_date = len(open_set_date.intersection(delivered_set_date))
-                total_bounce_date = len(bounce_set_date.intersection(processed_set_date))
+                total_processed_date, total_delivered_date, total_open_date, total_bounce_date = (
+                    funnel.loc[selected_date].tolist()
+                )
 
                 st.subheader(f"📊 Performance for {selected_date.strftime('%B %d, %Y')}")
                 
@@ -478,7 +862,9 @@ if uploaded_file is not None:
     with tab4:
         st.header("📥 Export Data")
         
-        if total_processed > 0:
+        if not tab4.open:
+            pass
+        elif total_processed > 0:
             st.markdown("### Available Downloads")
             
             col1, col2 = st.columns(2)
@@ -508,8 +894,9 @@ if uploaded_file is not None:
             with col2:
                 st.subheader("📈 Daily Data")
                 
-                # Daily pivot data
-                if 'pivot' in locals():
+                # Daily pivot data (cached; Tab 2 may not have run on this rerun)
+                pivot = daily_pivot(flags, filter_key)
+                if not pivot.empty:
                     daily_excel_data = to_excel(pivot)
                     st.download_button(
                         label="📈 Download Daily Trends",
@@ -522,15 +909,34 @@ if uploaded_file is not None:
             st.markdown("---")
             st.markdown("### 📋 Raw Data Export")
             
-            # Filtered data export
-            filtered_excel_data = to_excel(df_filtered)
-            st.download_button(
-                label="📋 Download Filtered Raw Data",
-                data=filtered_excel_data,
-                file_name=f"sendgrid_filtered_data_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+            # Filtered data export (the raw files can be huge, so they are only
+            # serialized when a button is clicked rather than on every rerun)
+            col1, col2 = st.columns(2)
+
+            with col1:
+                fits_excel = len(df_filtered) + 1 <= EXCEL_MAX_ROWS
+                st.download_button(
+                    label="📋 Download Filtered Raw Data",
+                    data=partial(raw_to_excel, file_bytes, df_filtered),
+                    file_name=f"sendgrid_filtered_data_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    disabled=not fits_excel,
+                    use_container_width=True
+                )
+                if not fits_excel:
+                    st.caption(
+                        f"⚠️ {len(df_filtered):,} rows exceed Excel's {EXCEL_MAX_ROWS - 1:,}-row limit; "
+                        "use the CSV export instead."
+                    )
+
+            with col2:
+                st.download_button(
+                    label="📋 Download Filtered Raw Data (CSV)",
+                    data=partial(raw_to_csv, file_bytes, df_filtered),
+                    file_name=f"sendgrid_filtered_data_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
         else:
             st.info("ℹ️ No data available for download. Please check your filters.")
 
@@ -2,11 +2,12 @@
 Main Streamlit application for SendGrid Analytics Dashboard
 """
 
+import io
 import streamlit as st
 from datetime import datetime
 
 # Import custom modules
-from config import UI_CONFIG, COLORS
+from config import UI_CONFIG, PAGE_CSS
 from data_processor import SendGridDataProcessor
 from visualizations import (
     create_trend_chart, 
@@ -31,49 +32,33 @@ def setup_page():
         initial_sidebar_state=UI_CONFIG['sidebar_state']
     )
     
-    # Custom CSS for clean design
-    st.markdown(f"""
-    <style>
-        .main-header {{
-            font-size: 2rem;
-            font-weight: 600;
-            color: {COLORS['primary']};
-            margin-bottom: 2rem;
-            padding-bottom: 0.5rem;
-            border-bottom: 2px solid {COLORS['light_gray']};
-        }}
-        
-        .metric-card {{
-            background: #ffffff;
-            padding: 1.5rem;
-            border-radius: 8px;
-            border: 1px solid {COLORS['border']};
-            text-align: center;
-        }}
-        
-        .section-header {{
-            font-size: 1.2rem;
-            font-weight: 500;
-            color: {COLORS['secondary']};
-            margin: 1.5rem 0 1rem 0;
-        }}
-        
-        .upload-area {{
-            border: 2px dashed #bdc3c7;
-            border-radius: 8px;
-            padding: 2rem;
-            text-align: center;
-            background: #fafbfc;
-        }}
-        
-        .status-excellent {{ color: #27ae60; }}
-        .status-good {{ color: #f39c12; }}
-        .status-poor {{ color: #e74c3c; }}
-    </style>
-    """, unsafe_allow_html=True)
+    # Custom CSS for clean design (built once in config, not on every rerun)
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
+
+
+@st.cache_data(show_spinner="Processing...", max_entries=4)
+def load_and_process(file_bytes):
+    """
+    Load and process an uploaded CSV, cached on the file contents
+    
+    Args:
+        file_bytes (bytes): Raw contents of the uploaded file
+    
+    Returns:
+        SendGridDataProcessor: Processor with processed_data populated
+    
+    Raises:
+        ValueError: If the file can't be loaded or is missing required columns
+    """
+    processor = SendGridDataProcessor()
+    success, message = processor.load_data(io.BytesIO(file_bytes))
+    if not success:
+        raise ValueError(message)
+    processor.process_data()
+    return processor
 
 
-def render_sidebar(processor):
+def render_sidebar():
     """Render sidebar with filters and controls"""
     with st.sidebar:
         st.subheader("📁 Upload Data")
@@ -84,16 +69,18 @@ def render_sidebar(processor):
         )
         
         if uploaded_file:
-            # Load data
-            if 'data_loaded' not in st.session_state:
-                success, message = processor.load_data(uploaded_file)
-                if success:
-                    processor.process_data()
-                    st.session_state.data_loaded = True
-                    st.success("✅ Data loaded successfully!")
-                else:
-                    st.error(f"❌ {message}")
+            # Load data once per upload; the session keeps its own processor
+            # (filters and memos are per user), re-uploads hit the cache
+            if st.session_state.get('file_id') != uploaded_file.file_id:
+                try:
+                    st.session_state.processor = load_and_process(uploaded_file.getvalue())
+                except ValueError as e:
+                    st.error(f"❌ {e}")
                     return None, None, None, None
+                st.session_state.file_id = uploaded_file.file_id
+                st.success("✅ Data loaded successfully!")
+            
+            processor = st.session_state.processor
             
             # Filters section
             st.subheader("🎯 Filters")
@@ -180,10 +167,9 @@ def render_metrics_overview(metrics):
         st.caption(bounce_status)
 
 
-def render_daily_view(processor):
+@st.fragment
+def render_daily_view(pivot_data):
     """Render daily performance view"""
-    pivot_data = processor.create_daily_pivot()
-    
     if not pivot_data.empty:
         # Display data table
         st.subheader("📅 Daily Performance")
@@ -207,6 +193,7 @@ def render_daily_view(processor):
         return None
 
 
+@st.fragment
 def render_trends_view(pivot_data):
     """Render trends and visualizations"""
     if pivot_data is not None and len(pivot_data) > 1:
@@ -233,6 +220,13 @@ def render_trends_view(pivot_data):
         st.warning("⚠️ No trend data available")
 
 
+@st.cache_data(show_spinner=False)
+def cached_excel(df):
+    """Excel bytes for a (small) DataFrame, cached on its contents"""
+    return to_excel(df)
+
+
+@st.fragment
 def render_export_section(processor, metrics, pivot_data):
     """Render data export section"""
     st.subheader("📥 Export Data")
@@ -242,7 +236,7 @@ def render_export_section(processor, metrics, pivot_data):
     with col1:
         st.markdown("**📊 Summary Report**")
         summary_df = processor.create_summary_dataframe(metrics)
-        summary_excel = to_excel(summary_df)
+        summary_excel = cached_excel(summary_df)
         
         st.download_button(
             "📊 Download Summary",
@@ -255,7 +249,7 @@ def render_export_section(processor, metrics, pivot_data):
     with col2:
         st.markdown("**📈 Daily Data**")
         if pivot_data is not None and not pivot_data.empty:
-            daily_excel = to_excel(pivot_data)
+            daily_excel = cached_excel(pivot_data)
             
             st.download_button(
                 "📈 Download Daily Data",
@@ -313,20 +307,16 @@ def main():
     # Setup page configuration
     setup_page()
     
-    # Initialize data processor
-    if 'processor' not in st.session_state:
-        st.session_state.processor = SendGridDataProcessor()
-    
-    processor = st.session_state.processor
-    
     # Header
     st.markdown('<h1 class="main-header">SendGrid Email Analytics Dashboard</h1>', 
                 unsafe_allow_html=True)
     
     # Render sidebar and get filters
-    uploaded_file, date_range, selected_subjects, excluded_emails = render_sidebar(processor)
+    uploaded_file, date_range, selected_subjects, excluded_emails = render_sidebar()
     
-    if uploaded_file and 'data_loaded' in st.session_state:
+    if uploaded_file:
+        processor = st.session_state.processor
+        
         # Apply filters
         filtered_data = processor.apply_filters(
             date_range=date_range,
@@ -337,25 +327,33 @@ def main():
         # Calculate metrics
         metrics = processor.calculate_metrics(filtered_data)
         
+        # Daily pivot, computed once and shared by all tabs
+        pivot_data = processor.create_daily_pivot(filtered_data)
+        
         if metrics['total_processed'] > 0:
             # Render main content
             render_metrics_overview(metrics)
             
             st.markdown("---")
             
-            # Create tabs
-            tab1, tab2, tab3 = st.tabs(["📅 Daily View", "📈 Trends", "📥 Export"])
+            # Create tabs (switching tabs reruns the script, so only the open tab renders)
+            tab1, tab2, tab3 = st.tabs(
+                ["📅 Daily View", "📈 Trends", "📥 Export"],
+                key="main_tabs",
+                on_change="rerun"
+            )
             
             with tab1:
-                pivot_data = render_daily_view(processor)
+                if tab1.open:
+                    render_daily_view(pivot_data)
             
             with tab2:
-                pivot_data = processor.create_daily_pivot()
-                render_trends_view(pivot_data)
+                if tab2.open:
+                    render_trends_view(pivot_data)
             
             with tab3:
-                pivot_data = processor.create_daily_pivot()
-                render_export_section(processor, metrics, pivot_data)
+                if tab3.open:
+                    render_export_section(processor, metrics, pivot_data)
         
         else:
             st.warning("⚠️ No data found with current filters. Please adjust your filter settings.")
@@ -9,6 +9,9 @@ VALID_EVENTS = ["processed", "delivered", "open", "bounce"]
 # Required columns in the CSV file
 REQUIRED_COLUMNS = ["event", "message_id", "processed"]
 
+# Columns read from the CSV file (everything else is skipped at parse time)
+USED_COLUMNS = {"event", "message_id", "processed", "subject", "email"}
+
 # Color scheme for charts
 COLORS = {
     'processed': '#3498db',
@@ -45,6 +48,48 @@ UI_CONFIG = {
     'sidebar_state': "expanded"
 }
 
+# Page CSS, formatted once at import (Streamlit re-executes app.py on every
+# rerun, but imported modules are only loaded once)
+PAGE_CSS = f"""
+    <style>
+        .main-header {{
+            font-size: 2rem;
+            font-weight: 600;
+            color: {COLORS['primary']};
+            margin-bottom: 2rem;
+            padding-bottom: 0.5rem;
+            border-bottom: 2px solid {COLORS['light_gray']};
+        }}
+        
+        .metric-card {{
+            background: #ffffff;
+            padding: 1.5rem;
+            border-radius: 8px;
+            border: 1px solid {COLORS['border']};
+            text-align: center;
+        }}
+        
+        .section-header {{
+            font-size: 1.2rem;
+            font-weight: 500;
+            color: {COLORS['secondary']};
+            margin: 1.5rem 0 1rem 0;
+        }}
+        
+        .upload-area {{
+            border: 2px dashed #bdc3c7;
+            border-radius: 8px;
+            padding: 2rem;
+            text-align: center;
+            background: #fafbfc;
+        }}
+        
+        .status-excellent {{ color: #27ae60; }}
+        .status-good {{ color: #f39c12; }}
+        .status-poor {{ color: #e74c3c; }}
+    </style>
+    """
+
 # Chart configuration
 CHART_CONFIG = {
     'height': 300,
@@ -3,8 +3,12 @@ Data processing module for SendGrid Analytics Dashboard
 Handles data loading, cleaning, filtering, and metric calculations
 """
 
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
-from config import VALID_EVENTS, REQUIRED_COLUMNS
+from pandas.tseries.api import guess_datetime_format
+from config import VALID_EVENTS, REQUIRED_COLUMNS, USED_COLUMNS
 from utils import validate_dataframe, clean_column_names, calculate_rate
 
 
@@ -13,10 +17,20 @@ class SendGridDataProcessor:
     Main class for processing SendGrid email event data
     """
     
+    # Daily pivots kept for the most recent filter combinations
+    PIVOT_CACHE_SIZE = 4
+    
     def __init__(self):
         self.raw_data = None
         self.processed_data = None
         self.filtered_data = None
+        # Daily pivots of filtered_data, keyed on the filters that produced it
+        # (least recently used first)
+        self._filter_key = None
+        self._pivot_cache = OrderedDict()
+        # Sorted filter options, built on first use after each process_data
+        self._unique_subjects = None
+        self._unique_emails = None
     
     def load_data(self, uploaded_file):
         """
@@ -29,8 +43,23 @@ class SendGridDataProcessor:
             tuple: (success, error_message)
         """
         try:
-            # Load CSV
-            self.raw_data = pd.read_csv(uploaded_file)
+            # Load CSV (only the columns the dashboard uses, with narrow dtypes;
+            # the pyarrow engine rejects callable usecols, so resolve them from the header)
+            header = pd.read_csv(uploaded_file, nrows=0).columns
+            usecols = [col for col in header if col.strip().lower() in USED_COLUMNS]
+            dtypes = {"event": "category", "message_id": "string", "subject": "string", "email": "string"}
+            dtype = {col: dtypes[col.strip().lower()] for col in usecols if col.strip().lower() in dtypes}
+            
+            uploaded_file.seek(0)
+            try:
+                self.raw_data = pd.read_csv(
+                    uploaded_file, engine="pyarrow", usecols=usecols, dtype=dtype, dtype_backend="pyarrow"
+                )
+            except ImportError:  # pyarrow not installed
+                uploaded_file.seek(0)
+                self.raw_data = pd.read_csv(
+                    uploaded_file, engine="c", usecols=usecols, dtype=dtype, low_memory=False, cache_dates=True
+                )
             
             # Clean column names
             self.raw_data = clean_column_names(self.raw_data)
@@ -56,43 +85,104 @@ class SendGridDataProcessor:
         if self.raw_data is None:
             return False
         
-        df = self.raw_data.copy()
+        df = self.raw_data
         
-        # Filter valid events
+        # Filter valid events (boolean indexing returns a new frame, so raw_data is untouched)
         df = df[df["event"].isin(VALID_EVENTS)]
         
+        # Store events as categories so grouping and dedup use integer codes
+        df["event"] = df["event"].astype(pd.CategoricalDtype(VALID_EVENTS))
+        
         # Process datetime
-        df["processed_datetime"] = pd.to_datetime(df["processed"], errors='coerce')
+        df["processed_datetime"] = self._parse_timestamps(df["processed"])
         df = df.dropna(subset=["processed_datetime"])
-        df["processed_date"] = df["processed_datetime"].dt.date
+        # Day-floored into an Arrow date32 (int32 days) instead of an object
+        # column of Python dates; values still compare with datetime.date
+        try:
+            df["processed_date"] = df["processed_datetime"].dt.floor("D").astype("date32[pyarrow]")
+        except ImportError:  # pyarrow not installed
+            df["processed_date"] = df["processed_datetime"].dt.date
+        
+        # Rows without a message ID can't be attributed to a message, so they
+        # are dropped and never counted (the old string-key dedup collapsed
+        # them into one row that calculate_metrics counted as a processed
+        # message while the daily pivot ignored it)
+        df = df.dropna(subset=["message_id"])
         
-        # Find processed message IDs
-        processed_ids = set(df.loc[df["event"] == "processed", "message_id"].unique())
+        # Encode message IDs once so isin/dedup/groupby below hash integer codes
+        df["message_id"] = df["message_id"].astype("category")
+        
+        # Keep messages that have a processed event
+        processed_ids = df.loc[df["event"] == "processed", "message_id"].unique()
         df = df[df["message_id"].isin(processed_ids)]
         
         # Remove duplicate events per message per date
-        df["unique_event"] = (df["message_id"].astype(str) + "_" + 
-                             df["event"] + "_" + 
-                             df["processed_date"].astype(str))
-        df = df.drop_duplicates(subset=["unique_event"])
+        df = df.drop_duplicates(subset=["message_id", "event", "processed_date"])
         
-        # Process subjects if available
+        # Process subjects if available (each message takes its processed event's subject)
         if "subject" in df.columns:
-            processed_df = df[df["event"] == "processed"][["message_id", "subject"]].drop_duplicates(subset=["message_id"])
-            df = df.merge(processed_df, on="message_id", how="left", suffixes=('', '_processed'))
-            df["subject"] = df["subject_processed"]
+            subjects = (
+                df.loc[df["event"] == "processed", ["message_id", "subject"]]
+                .drop_duplicates(subset=["message_id"])
+                .set_index("message_id")["subject"]
+            )
+            df["subject"] = df["message_id"].map(subjects)
         
         self.processed_data = df
+        self._pivot_cache.clear()
+        self._unique_subjects = None
+        self._unique_emails = None
         return True
     
+    @staticmethod
+    def _parse_timestamps(values):
+        """
+        Parse event timestamps into timezone-naive local wall times
+        
+        SendGrid timestamps are ISO 8601, which pandas parses in C; anything
+        the ISO parse rejects (e.g. 01/14/2024 20:00) gets pandas' inferred
+        parsing, and values neither can read become NaT. Offsets are dropped
+        rather than converted, so events are dated by their local day.
+        Timestamps with mixed offsets can only be held in UTC, so those are
+        dated by their UTC day.
+        
+        Args:
+            values (pd.Series): Raw timestamp strings
+        
+        Returns:
+            pd.Series: Parsed datetimes
+        """
+        def parse(raw, **kwargs):
+            try:
+                parsed = pd.to_datetime(raw, errors='coerce', **kwargs)
+            except ValueError:  # mixed UTC offsets
+                parsed = pd.to_datetime(raw, errors='coerce', utc=True, **kwargs)
+            if parsed.dt.tz is not None:
+                parsed = parsed.dt.tz_localize(None)
+            return parsed
+        
+        parsed = parse(values, format="ISO8601")
+        retry = parsed.isna() & values.notna()
+        if retry.any():
+            # Guess the format from the first value, as pandas' inference does,
+            # but pass it explicitly: when no format can be guessed, "mixed"
+            # parses each value the same way without the "Could not infer
+            # format" warning
+            rest = values[retry]
+            first = rest[rest.str.strip() != ""]
+            fmt = guess_datetime_format(first.iloc[0]) if len(first) else None
+            parsed = parsed.astype("datetime64[us]")
+            parsed[retry] = parse(rest, format=fmt or "mixed").astype("datetime64[us]")
+        return parsed
+    
     def get_date_range(self):
         """
         Get the date range of processed data
         
         Returns:
-            tuple: (min_date, max_date)
+            tuple: (min_date, max_date), or (None, None) if there is no data
         """
-        if self.processed_data is None:
+        if self.processed_data is None or self.processed_data.empty:
             return None, None
         
         return (self.processed_data["processed_date"].min(), 
@@ -100,7 +190,7 @@ class SendGridDataProcessor:
     
     def get_unique_subjects(self):
         """
-        Get list of unique email subjects
+        Get list of unique email subjects (cached until the next process_data)
         
         Returns:
             list: Sorted list of unique subjects
@@ -108,11 +198,13 @@ class SendGridDataProcessor:
         if self.processed_data is None or "subject" not in self.processed_data.columns:
             return []
         
-        return sorted(self.processed_data["subject"].dropna().unique())
+        if self._unique_subjects is None:
+            self._unique_subjects = self.processed_data["subject"].dropna().drop_duplicates().sort_values().tolist()
+        return self._unique_subjects
     
     def get_unique_emails(self):
         """
-        Get list of unique email addresses
+        Get list of unique email addresses (cached until the next process_data)
         
         Returns:
             list: Sorted list of unique email addresses
@@ -120,7 +212,9 @@ class SendGridDataProcessor:
         if self.processed_data is None or "email" not in self.processed_data.columns:
             return []
         
-        return sorted(self.processed_data["email"].dropna().unique())
+        if self._unique_emails is None:
+            self._unique_emails = self.processed_data["email"].dropna().drop_duplicates().sort_values().tolist()
+        return self._unique_emails
     
     def apply_filters(self, date_range=None, selected_subjects=None, excluded_emails=None):
         """
@@ -137,23 +231,31 @@ class SendGridDataProcessor:
         if self.processed_data is None:
             return pd.DataFrame()
         
-        df = self.processed_data.copy()
+        data = self.processed_data
+        # All filters are ANDed into one mask so the frame is indexed once
+        mask = np.ones(len(data), dtype=bool)
         
         # Apply date filter
         if date_range and isinstance(date_range, tuple) and len(date_range) == 2:
             start_date, end_date = date_range
-            mask = (df["processed_date"] >= start_date) & (df["processed_date"] <= end_date)
-            df = df[mask]
+            dates = data["processed_date"]
+            mask &= ((dates >= start_date) & (dates <= end_date)).to_numpy()
         
         # Apply subject filter
-        if selected_subjects and "subject" in df.columns:
-            df = df[df["subject"].isin(selected_subjects)]
+        if selected_subjects and "subject" in data.columns:
+            mask &= data["subject"].isin(selected_subjects).to_numpy()
         
         # Apply email exclusion filter
-        if excluded_emails and "email" in df.columns:
-            df = df[~df["email"].isin(excluded_emails)]
+        if excluded_emails and "email" in data.columns:
+            mask &= ~data["email"].isin(excluded_emails).to_numpy()
         
+        df = data[mask]
         self.filtered_data = df
+        self._filter_key = (
+            tuple(date_range) if date_range else None,
+            tuple(sorted(selected_subjects or [])),
+            tuple(sorted(excluded_emails or []))
+        )
         return df
     
     def calculate_metrics(self, data=None):
@@ -180,17 +282,21 @@ class SendGridDataProcessor:
                 "bounce_rate": 0
             }
         
-        # Calculate unique message counts by event type
-        processed_set = set(data[data["event"] == "processed"]["message_id"].unique())
-        delivered_set = set(data[data["event"] == "delivered"]["message_id"].unique())
-        open_set = set(data[data["event"] == "open"]["message_id"].unique())
-        bounce_set = set(data[data["event"] == "bounce"]["message_id"].unique())
+        # One boolean row per message with a column for each event it has
+        flags = (
+            data.groupby(["message_id", "event"], observed=True).size()
+            .unstack("event", fill_value=0)
+            .reindex(columns=VALID_EVENTS, fill_value=0)
+            .astype(bool)
+        )
+        processed = flags["processed"]
+        delivered = flags["delivered"]
         
         # Calculate totals
-        total_processed = len(processed_set)
-        total_delivered = len(delivered_set.intersection(processed_set))
-        total_opened = len(open_set.intersection(delivered_set))
-        total_bounced = len(bounce_set.intersection(processed_set))
+        total_processed = int(processed.sum())
+        total_delivered = int((delivered & processed).sum())
+        total_opened = int((flags["open"] & delivered).sum())
+        total_bounced = int((flags["bounce"] & processed).sum())
         
         # Calculate rates
         delivery_rate = calculate_rate(total_delivered, total_processed)
@@ -211,6 +317,9 @@ class SendGridDataProcessor:
         """
         Create daily pivot table with metrics
         
+        Pivots of filtered_data are memoized on the filters applied by
+        apply_filters, so re-renders with unchanged filters reuse them.
+        
         Args:
             data (pd.DataFrame): Data to pivot (uses filtered_data if None)
         
@@ -223,31 +332,37 @@ class SendGridDataProcessor:
         if data is None or data.empty:
             return pd.DataFrame()
         
-        # Create pivot table
-        pivot = data.pivot_table(
-            index="processed_date",
-            columns="event",
-            values="message_id",
-            aggfunc=lambda x: x.nunique(),
-            fill_value=0
-        ).reset_index().sort_values("processed_date")
-        
-        # Ensure all event columns exist
-        for col in VALID_EVENTS:
-            if col not in pivot.columns:
-                pivot[col] = 0
-        
-        # Calculate rates
-        pivot["Delivery Rate"] = pivot.apply(
-            lambda row: calculate_rate(row["delivered"], row["processed"]), axis=1
-        )
-        pivot["Open Rate"] = pivot.apply(
-            lambda row: calculate_rate(row["open"], row["delivered"]), axis=1
-        )
-        pivot["Bounce Rate"] = pivot.apply(
-            lambda row: calculate_rate(row["bounce"], row["processed"]), axis=1
+        cache_key = self._filter_key if data is self.filtered_data else None
+        if cache_key is not None and cache_key in self._pivot_cache:
+            self._pivot_cache.move_to_end(cache_key)
+            return self._pivot_cache[cache_key]
+        
+        # Unique messages per date and event (reindex ensures all event columns exist).
+        # Groups are left unsorted and only the small per-day result is sorted.
+        pivot = (
+            data.groupby(["processed_date", "event"], sort=False, observed=True)["message_id"]
+            .nunique()
+            .unstack("event", fill_value=0)
+            .reindex(columns=VALID_EVENTS, fill_value=0)
+            .sort_index()
+            .reset_index()
         )
         
+        # Calculate rates (vectorized; zero denominators give a 0% rate)
+        processed = pivot["processed"].to_numpy(dtype=float)
+        delivered = pivot["delivered"].to_numpy(dtype=float)
+        pivot["Delivery Rate"] = np.divide(delivered, processed, out=np.zeros_like(processed), where=processed > 0) * 100
+        pivot["Open Rate"] = np.divide(
+            pivot["open"].to_numpy(dtype=float), delivered, out=np.zeros_like(delivered), where=delivered > 0
+        ) * 100
+        pivot["Bounce Rate"] = np.divide(
+            pivot["bounce"].to_numpy(dtype=float), processed, out=np.zeros_like(processed), where=processed > 0
+        ) * 100
+        
+        if cache_key is not None:
+            self._pivot_cache[cache_key] = pivot
+            if len(self._pivot_cache) > self.PIVOT_CACHE_SIZE:
+                self._pivot_cache.popitem(last=False)
         return pivot
     
     def get_date_specific_data(self, selected_date):
@@ -1,373 +1,121 @@
 """
-Visualization module for SendGrid Analytics Dashboard
-Contains all chart creation and data visualization functions
+Utility module for SendGrid Analytics Dashboard
+Contains helper functions for validation, formatting and file export
 """
 
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from config import COLORS, CHART_CONFIG
+import io
+from datetime import datetime
 
+import pandas as pd
+from config import BENCHMARKS, EXPORT_CONFIG
 
-def create_trend_chart(data, title="Email Performance Over Time"):
+
+def validate_dataframe(df, required_columns):
     """
-    Create a line chart showing email trends over time
-    
+    Check that a DataFrame has all the required columns
+
     Args:
-        data (pd.DataFrame): DataFrame with daily data
-        title (str): Chart title
-    
+        df (pd.DataFrame): Data to check
+        required_columns (list): Column names that must be present
+
     Returns:
-        plotly.graph_objects.Figure: Interactive line chart
+        tuple: (is_valid, missing_columns)
     """
-    if data.empty:
-        return go.Figure().add_annotation(
-            text="No data available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-    
-    fig = px.line(
-        data, 
-        x='processed_date', 
-        y=['processed', 'delivered', 'open'], 
-        title=title,
-        color_discrete_map={
-            'processed': COLORS['processed'],
-            'delivered': COLORS['delivered'], 
-            'open': COLORS['open']
-        },
-        labels={
-            'processed_date': 'Date',
-            'value': 'Number of Emails',
-            'variable': 'Event Type'
-        }
-    )
-    
-    fig.update_layout(
-        showlegend=True,
-        height=CHART_CONFIG['height'],
-        margin=CHART_CONFIG['margin'],
-        plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
-        hovermode='x unified'
-    )
-    
-    return fig
+    missing = [col for col in required_columns if col not in df.columns]
+    return not missing, missing
 
 
-def create_performance_donut(processed, delivered, opened, bounced, title="Email Distribution"):
+def clean_column_names(df):
     """
-    Create a donut chart showing email performance distribution
-    
+    Strip surrounding whitespace from the column names
+
     Args:
-        processed (int): Total processed emails
-        delivered (int): Total delivered emails
-        opened (int): Total opened emails
-        bounced (int): Total bounced emails
-        title (str): Chart title
-    
+        df (pd.DataFrame): Data whose columns to clean
+
     Returns:
-        plotly.graph_objects.Figure: Donut chart
+        pd.DataFrame: The same DataFrame, with cleaned column names
     """
-    if processed == 0:
-        return go.Figure().add_annotation(
-            text="No data available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-    
-    # Calculate segments
-    not_delivered = processed - delivered - bounced
-    
-    fig = go.Figure(data=[go.Pie(
-        labels=['Delivered', 'Opened', 'Bounced', 'Not Delivered'],
-        values=[delivered, opened, bounced, max(0, not_delivered)],
-        hole=0.4,
-        marker_colors=[
-            COLORS['delivered'], 
-            COLORS['open'], 
-            COLORS['bounce'], 
-            '#95a5a6'
-        ]
-    )])
-    
-    fig.update_layout(
-        title=title,
-        showlegend=True,
-        height=400,
-        margin=dict(l=20, r=20, t=40, b=20)
-    )
-    
-    return fig
+    df.columns = df.columns.str.strip()
+    return df
 
 
-def create_rate_comparison_chart(data, title="Performance Rates Over Time"):
+def calculate_rate(numerator, denominator):
     """
-    Create a chart comparing different rates over time
-    
+    Calculate a percentage rate, treating a zero denominator as a 0% rate
+
     Args:
-        data (pd.DataFrame): DataFrame with daily rates
-        title (str): Chart title
-    
+        numerator (int): Count of matching emails
+        denominator (int): Count the rate is relative to
+
     Returns:
-        plotly.graph_objects.Figure: Rate comparison chart
+        float: Rate in percent
     """
-    if data.empty or 'Delivery Rate' not in data.columns:
-        return go.Figure().add_annotation(
-            text="No rate data available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-    
-    fig = go.Figure()
-    
-    # Add delivery rate
-    fig.add_trace(go.Scatter(
-        x=data['processed_date'],
-        y=data['Delivery Rate'],
-        mode='lines+markers',
-        name='Delivery Rate (%)',
-        line=dict(color=COLORS['delivered'], width=3),
-        marker=dict(size=6)
-    ))
-    
-    # Add open rate
-    if 'Open Rate' in data.columns:
-        fig.add_trace(go.Scatter(
-            x=data['processed_date'],
-            y=data['Open Rate'],
-            mode='lines+markers',
-            name='Open Rate (%)',
-            line=dict(color=COLORS['open'], width=3),
-            marker=dict(size=6)
-        ))
-    
-    # Add bounce rate
-    if 'Bounce Rate' in data.columns:
-        fig.add_trace(go.Scatter(
-            x=data['processed_date'],
-            y=data['Bounce Rate'],
-            mode='lines+markers',
-            name='Bounce Rate (%)',
-            line=dict(color=COLORS['bounce'], width=3),
-            marker=dict(size=6)
-        ))
-    
-    fig.update_layout(
-        title=title,
-        xaxis_title='Date',
-        yaxis_title='Rate (%)',
-        height=CHART_CONFIG['height'],
-        margin=CHART_CONFIG['margin'],
-        plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
-        hovermode='x unified',
-        showlegend=True
-    )
-    
-    return fig
+    return numerator / denominator * 100 if denominator else 0.0
 
 
-def create_metric_gauge(value, title, max_value=100, color=None):
+def format_number(value):
     """
-    Create a gauge chart for a single metric
-    
+    Format a count with thousands separators
+
     Args:
-        value (float): Current value
-        title (str): Gauge title
-        max_value (float): Maximum value for the gauge
-        color (str): Color for the gauge
-    
+        value (int): Number to format
+
     Returns:
-        plotly.graph_objects.Figure: Gauge chart
+        str: Formatted number (e.g. "12,345")
     """
-    if color is None:
-        color = COLORS['primary']
-    
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=value,
-        domain={'x': [0, 1], 'y': [0, 1]},
-        title={'text': title},
-        delta={'reference': max_value * 0.8},
-        gauge={
-            'axis': {'range': [None, max_value]},
-            'bar': {'color': color},
-            'steps': [
-                {'range': [0, max_value * 0.5], 'color': "lightgray"},
-                {'range': [max_value * 0.5, max_value * 0.8], 'color': "gray"}
-            ],
-            'threshold': {
-                'line': {'color': "red", 'width': 4},
-                'thickness': 0.75,
-                'value': max_value * 0.9
-            }
-        }
-    ))
-    
-    fig.update_layout(
-        height=200,
-        margin=dict(l=20, r=20, t=40, b=20)
-    )
-    
-    return fig
+    return f"{value:,}"
 
 
-def create_volume_bar_chart(data, title="Daily Email Volume"):
+def get_performance_status(rate, metric):
     """
-    Create a bar chart showing daily email volumes
-    
+    Rate a metric against the benchmarks in config.py
+
     Args:
-        data (pd.DataFrame): DataFrame with daily data
-        title (str): Chart title
-    
+        rate (float): Rate in percent
+        metric (str): 'delivery_rate', 'open_rate' or 'bounce_rate'
+
     Returns:
-        plotly.graph_objects.Figure: Bar chart
+        tuple: (status label, CSS class from PAGE_CSS)
     """
-    if data.empty:
-        return go.Figure().add_annotation(
-            text="No data available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-    
-    fig = go.Figure()
-    
-    # Add bars for each event type
-    fig.add_trace(go.Bar(
-        x=data['processed_date'],
-        y=data['processed'],
-        name='Processed',
-        marker_color=COLORS['processed']
-    ))
-    
-    fig.add_trace(go.Bar(
-        x=data['processed_date'],
-        y=data['delivered'],
-        name='Delivered',
-        marker_color=COLORS['delivered']
-    ))
-    
-    fig.add_trace(go.Bar(
-        x=data['processed_date'],
-        y=data['open'],
-        name='Opened',
-        marker_color=COLORS['open']
-    ))
-    
-    if 'bounce' in data.columns:
-        fig.add_trace(go.Bar(
-            x=data['processed_date'],
-            y=data['bounce'],
-            name='Bounced',
-            marker_color=COLORS['bounce']
-        ))
-    
-    fig.update_layout(
-        title=title,
-        xaxis_title='Date',
-        yaxis_title='Number of Emails',
-        height=CHART_CONFIG['height'],
-        margin=CHART_CONFIG['margin'],
-        plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
-        barmode='group',
-        showlegend=True
-    )
-    
-    return fig
+    benchmark = BENCHMARKS[metric]
+    if metric == 'bounce_rate':  # lower is better
+        if rate < benchmark['excellent']:
+            return "🟢 Excellent", "status-excellent"
+        if rate < benchmark['acceptable']:
+            return "🟡 Good", "status-good"
+    else:
+        if rate > benchmark['excellent']:
+            return "🟢 Excellent", "status-excellent"
+        if rate > benchmark['good']:
+            return "🟡 Good", "status-good"
+    return "🔴 Needs Improvement", "status-poor"
 
 
-def create_comparison_chart(current_metrics, comparison_metrics, title="Performance Comparison"):
+def to_excel(df):
     """
-    Create a comparison chart between two sets of metrics
-    
+    Convert a DataFrame to xlsx bytes for download
+
     Args:
-        current_metrics (dict): Current period metrics
-        comparison_metrics (dict): Comparison period metrics
-        title (str): Chart title
-    
+        df (pd.DataFrame): Data to export
+
     Returns:
-        plotly.graph_objects.Figure: Comparison chart
+        bytes: Excel workbook
     """
-    metrics = ['delivery_rate', 'open_rate', 'bounce_rate']
-    metric_labels = ['Delivery Rate (%)', 'Open Rate (%)', 'Bounce Rate (%)']
-    
-    current_values = [current_metrics.get(m, 0) for m in metrics]
-    comparison_values = [comparison_metrics.get(m, 0) for m in metrics]
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        x=metric_labels,
-        y=current_values,
-        name='Current',
-        marker_color=COLORS['primary']
-    ))
-    
-    fig.add_trace(go.Bar(
-        x=metric_labels,
-        y=comparison_values,
-        name='Comparison',
-        marker_color=COLORS['secondary']
-    ))
-    
-    fig.update_layout(
-        title=title,
-        yaxis_title='Rate (%)',
-        height=CHART_CONFIG['height'],
-        margin=CHART_CONFIG['margin'],
-        plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
-        barmode='group',
-        showlegend=True
-    )
-    
-    return fig
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine=EXPORT_CONFIG['engine']) as writer:
+        df.to_excel(writer, index=False, sheet_name=EXPORT_CONFIG['sheet_name'])
+    return output.getvalue()
 
 
-def create_simple_metric_chart(value, title, format_type="number"):
+def generate_filename(prefix, extension="xlsx"):
     """
-    Create a simple metric display chart
-    
+    Build a timestamped export filename
+
     Args:
-        value (float): Value to display
-        title (str): Metric title
-        format_type (str): How to format the value
-    
+        prefix (str): What the file holds (e.g. "summary")
+        extension (str): File extension
+
     Returns:
-        plotly.graph_objects.Figure: Simple metric chart
+        str: Filename like sendgrid_summary_20240314_093000.xlsx
     """
-    if format_type == "percentage":
-        display_value = f"{value:.1f}%"
-    elif format_type == "number":
-        display_value = f"{value:,.0f}"
-    else:
-        display_value = str(value)
-    
-    fig = go.Figure()
-    
-    fig.add_annotation(
-        text=f"<b>{display_value}</b>",
-        x=0.5, y=0.6,
-        xref="paper", yref="paper",
-        font=dict(size=30, color=COLORS['primary']),
-        showarrow=False
-    )
-    
-    fig.add_annotation(
-        text=title,
-        x=0.5, y=0.3,
-        xref="paper", yref="paper",
-        font=dict(size=16, color=COLORS['secondary']),
-        showarrow=False
-    )
-    
-    fig.update_layout(
-        height=150,
-        margin=dict(l=0, r=0, t=0, b=0),
-        plot_bgcolor='white',
-        paper_bgcolor='white'
-    )
-    
-    fig.update_xaxes(visible=False)
-    fig.update_yaxes(visible=False)
-    
-    return fig
\ No newline at end of file
+    return f"sendgrid_{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
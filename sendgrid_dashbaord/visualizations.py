@@ -3,12 +3,212 @@ Visualization module for SendGrid Analytics Dashboard
 Contains all chart creation and data visualization functions
 """
 
-import plotly.express as px
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import plotly.io as pio
 from config import COLORS, CHART_CONFIG
 
+# Number of figures each chart builder keeps
+FIGURE_CACHE_SIZE = 32
+
+# Rough row budget for line charts; longer date ranges are downsampled
+MAX_LINE_POINTS = 400
+
+# Event columns drawn by the trend chart, with their trace settings (the hover
+# label is the one plotly.express gave the lines)
+TREND_HOVERTEMPLATE = 'Event Type={}<br>Date=%{{x}}<br>Number of Emails=%{{y}}<extra></extra>'
+TREND_SERIES = (
+    ('processed', dict(mode='lines', name='processed', line=dict(color=COLORS['processed']),
+                       hovertemplate=TREND_HOVERTEMPLATE.format('processed'))),
+    ('delivered', dict(mode='lines', name='delivered', line=dict(color=COLORS['delivered']),
+                       hovertemplate=TREND_HOVERTEMPLATE.format('delivered'))),
+    ('open', dict(mode='lines', name='open', line=dict(color=COLORS['open']),
+                  hovertemplate=TREND_HOVERTEMPLATE.format('open'))),
+)
+
+# Event columns drawn by the volume bar chart, with their trace settings
+VOLUME_BAR_SERIES = (
+    ('processed', dict(name='Processed', marker_color=COLORS['processed'])),
+    ('delivered', dict(name='Delivered', marker_color=COLORS['delivered'])),
+    ('open', dict(name='Opened', marker_color=COLORS['open'])),
+    ('bounce', dict(name='Bounced', marker_color=COLORS['bounce'])),
+)
+
+# Donut segments and their colors, in drawing order
+DONUT_LABELS = np.array(['Delivered', 'Opened', 'Bounced', 'Not Delivered'])
+DONUT_COLORS = np.array([COLORS['delivered'], COLORS['open'], COLORS['bounce'], '#95a5a6'])
+
+# Rate columns drawn by the rate comparison chart, with their trace settings
+RATE_MARKER = dict(size=6)
+RATE_SERIES = (
+    ('Delivery Rate', dict(mode='lines+markers', name='Delivery Rate (%)',
+                           line=dict(color=COLORS['delivered'], width=3), marker=RATE_MARKER)),
+    ('Open Rate', dict(mode='lines+markers', name='Open Rate (%)',
+                       line=dict(color=COLORS['open'], width=3), marker=RATE_MARKER)),
+    ('Bounce Rate', dict(mode='lines+markers', name='Bounce Rate (%)',
+                         line=dict(color=COLORS['bounce'], width=3), marker=RATE_MARKER)),
+)
+
+# Margins for the donut/gauge panels and the bare metric display
+PANEL_MARGIN = dict(l=20, r=20, t=40, b=20)
+METRIC_MARGIN = dict(l=0, r=0, t=0, b=0)
+
+# Fixed parts of the metric gauge; the ranges depend on max_value
+GAUGE_DOMAIN = {'x': [0, 1], 'y': [0, 1]}
+GAUGE_THRESHOLD_LINE = {'color': "red", 'width': 4}
+
+# Fonts for the metric display's value and title
+METRIC_VALUE_FONT = dict(size=30, color=COLORS['primary'])
+METRIC_TITLE_FONT = dict(size=16, color=COLORS['secondary'])
+
 
+def _cache_key_part(value):
+    """
+    Turn a chart builder argument into a hashable cache key component
+    
+    DataFrames are keyed on a hash of every row plus their column labels.
+    """
+    if isinstance(value, pd.DataFrame):
+        digest = hashlib.blake2b(
+            pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes(), digest_size=16
+        )
+        digest.update("\x1f".join(map(str, value.columns)).encode())
+        return ("DataFrame", digest.hexdigest())
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted(value.items())))
+    return value
+
+
+def _placeholder_figure(text):
+    """
+    Build the figure shown in place of a chart that has nothing to plot
+    """
+    return go.Figure().add_annotation(
+        text=text,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False
+    )
+
+
+# Shared placeholders for empty charts; like memoized figures, treat them as
+# read-only
+NO_DATA_FIGURE = _placeholder_figure("No data available")
+NO_RATE_DATA_FIGURE = _placeholder_figure("No rate data available")
+
+
+def _date_axis_values(dates):
+    """
+    Convert a date column to epoch milliseconds for a date x axis
+    
+    Plotly serializes integer arrays as packed binary, while date objects are
+    formatted to ISO strings one by one; on an axis of type 'date' plotly.js
+    reads the integers as milliseconds since the epoch.
+    
+    Args:
+        dates (pd.Series): Dates or datetimes (tz-aware values map to UTC)
+    
+    Returns:
+        numpy.ndarray: int64 epoch milliseconds
+    """
+    return pd.DatetimeIndex(pd.to_datetime(dates)).as_unit('ms').asi8
+
+
+def _downsample_rows(data, columns, max_points=MAX_LINE_POINTS):
+    """
+    Thin a long daily frame to roughly max_points rows for line charts
+    
+    The rows are split into equal buckets and each bucket keeps the rows
+    holding the minimum and maximum of every column, so peaks and dips
+    survive. All series keep one shared set of dates.
+    
+    Args:
+        data (pd.DataFrame): Daily data in date order
+        columns (list): Columns that will be drawn
+        max_points (int): Row budget for the result
+    
+    Returns:
+        pd.DataFrame: data itself if it is within budget, else a row subset
+    """
+    if len(data) <= max_points or not columns:
+        return data
+    
+    values = np.nan_to_num(data[columns].to_numpy(dtype=float))
+    buckets = max(1, max_points // (2 * len(columns)))
+    edges = np.linspace(0, len(data), buckets + 1).astype(np.intp)
+    
+    keep = [0, len(data) - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        bucket = values[start:stop]
+        keep.extend(start + bucket.argmin(axis=0))
+        keep.extend(start + bucket.argmax(axis=0))
+    
+    return data.iloc[np.unique(keep)]
+
+
+def memoize_figure(builder):
+    """
+    Cache a chart builder's figures keyed on its arguments
+    
+    Repeat calls with equal arguments skip the builder and return the cached
+    figure itself, like functools.lru_cache would; treat returned figures as
+    read-only. Passing return_json=True returns the figure's plotly JSON
+    instead, serialized once per cached figure, for callers that ship JSON
+    to the browser themselves. The cache is shared by every Streamlit
+    session thread, so its bookkeeping runs under a lock (builds do not).
+    
+    Args:
+        builder (callable): Function returning a plotly Figure
+    
+    Returns:
+        callable: Memoized builder with the same signature plus return_json
+    """
+    cache = OrderedDict()
+    lock = threading.Lock()
+    
+    @functools.wraps(builder)
+    def wrapper(*args, return_json=False, **kwargs):
+        try:
+            key = (
+                tuple(_cache_key_part(arg) for arg in args),
+                tuple(sorted((name, _cache_key_part(arg)) for name, arg in kwargs.items()))
+            )
+            hash(key)
+        except TypeError:  # unhashable argument, build uncached
+            fig = builder(*args, **kwargs)
+            return pio.to_json(fig, validate=False) if return_json else fig
+        
+        with lock:
+            entry = cache.get(key)
+            if entry is not None:
+                cache.move_to_end(key)
+        
+        if entry is None:
+            # Built outside the lock; if another thread built the same key
+            # meanwhile, keep its entry so every caller shares one figure
+            built = [builder(*args, **kwargs), None]
+            with lock:
+                entry = cache.setdefault(key, built)
+                cache.move_to_end(key)
+                if len(cache) > FIGURE_CACHE_SIZE:
+                    cache.popitem(last=False)
+        
+        if not return_json:
+            return entry[0]
+        if entry[1] is None:
+            # Racing threads may both serialize; the strings are identical
+            entry[1] = pio.to_json(entry[0], validate=False)
+        return entry[1]
+    
+    return wrapper
+
+
+@memoize_figure
 def create_trend_chart(data, title="Email Performance Over Time"):
     """
     Create a line chart showing email trends over time
@@ -21,40 +221,32 @@ def create_trend_chart(data, title="Email Performance Over Time"):
         plotly.graph_objects.Figure: Interactive line chart
     """
     if data.empty:
-        return go.Figure().add_annotation(
-            text="No data available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
+        return NO_DATA_FIGURE
+    
+    # One line per event type, built directly rather than through plotly.express
+    # (which melts the frame to long form first)
+    data = _downsample_rows(data, [event for event, _ in TREND_SERIES])
+    x = _date_axis_values(data['processed_date'])
+    fig = go.Figure(
+        data=[go.Scatter(x=x, y=data[event].to_numpy(), **trace) for event, trace in TREND_SERIES],
+        layout=dict(
+            title=title,
+            xaxis_title='Date',
+            xaxis_type='date',
+            yaxis_title='Number of Emails',
+            legend_title_text='Event Type',
+            showlegend=True,
+            height=CHART_CONFIG['height'],
+            margin=CHART_CONFIG['margin'],
+            plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
+            hovermode='x unified'
         )
-    
-    fig = px.line(
-        data, 
-        x='processed_date', 
-        y=['processed', 'delivered', 'open'], 
-        title=title,
-        color_discrete_map={
-            'processed': COLORS['processed'],
-            'delivered': COLORS['delivered'], 
-            'open': COLORS['open']
-        },
-        labels={
-            'processed_date': 'Date',
-            'value': 'Number of Emails',
-            'variable': 'Event Type'
-        }
-    )
-    
-    fig.update_layout(
-        showlegend=True,
-        height=CHART_CONFIG['height'],
-        margin=CHART_CONFIG['margin'],
-        plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
-        hovermode='x unified'
     )
     
     return fig
 
 
+@memoize_figure
 def create_performance_donut(processed, delivered, opened, bounced, title="Email Distribution"):
     """
     Create a donut chart showing email performance distribution
@@ -69,38 +261,33 @@ def create_performance_donut(processed, delivered, opened, bounced, title="Email
     Returns:
         plotly.graph_objects.Figure: Donut chart
     """
-    if processed == 0:
-        return go.Figure().add_annotation(
-            text="No data available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
+    # Calculate segments, dropping empty ones so they get no legend entry
+    values = np.array([delivered, opened, bounced, processed - delivered - bounced])
+    values[3] = max(0, values[3])
+    present = values > 0
+    
+    if processed == 0 or not present.any():
+        return NO_DATA_FIGURE
+    
+    fig = go.Figure(
+        data=[go.Pie(
+            labels=DONUT_LABELS[present],
+            values=values[present],
+            hole=0.4,
+            marker_colors=DONUT_COLORS[present]
+        )],
+        layout=dict(
+            title=title,
+            showlegend=True,
+            height=400,
+            margin=PANEL_MARGIN
         )
-    
-    # Calculate segments
-    not_delivered = processed - delivered - bounced
-    
-    fig = go.Figure(data=[go.Pie(
-        labels=['Delivered', 'Opened', 'Bounced', 'Not Delivered'],
-        values=[delivered, opened, bounced, max(0, not_delivered)],
-        hole=0.4,
-        marker_colors=[
-            COLORS['delivered'], 
-            COLORS['open'], 
-            COLORS['bounce'], 
-            '#95a5a6'
-        ]
-    )])
-    
-    fig.update_layout(
-        title=title,
-        showlegend=True,
-        height=400,
-        margin=dict(l=20, r=20, t=40, b=20)
     )
     
     return fig
 
 
+@memoize_figure
 def create_rate_comparison_chart(data, title="Performance Rates Over Time"):
     """
     Create a chart comparing different rates over time
@@ -113,60 +300,32 @@ def create_rate_comparison_chart(data, title="Performance Rates Over Time"):
         plotly.graph_objects.Figure: Rate comparison chart
     """
     if data.empty or 'Delivery Rate' not in data.columns:
-        return go.Figure().add_annotation(
-            text="No rate data available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
+        return NO_RATE_DATA_FIGURE
+    
+    series = [(column, trace) for column, trace in RATE_SERIES if column in data.columns]
+    data = _downsample_rows(data, [column for column, _ in series])
+    
+    # A line per rate column present, sharing a single date array
+    x = _date_axis_values(data['processed_date'])
+    fig = go.Figure(
+        data=[go.Scatter(x=x, y=data[column].to_numpy(), **trace) for column, trace in series],
+        layout=dict(
+            title=title,
+            xaxis_title='Date',
+            xaxis_type='date',
+            yaxis_title='Rate (%)',
+            height=CHART_CONFIG['height'],
+            margin=CHART_CONFIG['margin'],
+            plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
+            hovermode='x unified',
+            showlegend=True
         )
-    
-    fig = go.Figure()
-    
-    # Add delivery rate
-    fig.add_trace(go.Scatter(
-        x=data['processed_date'],
-        y=data['Delivery Rate'],
-        mode='lines+markers',
-        name='Delivery Rate (%)',
-        line=dict(color=COLORS['delivered'], width=3),
-        marker=dict(size=6)
-    ))
-    
-    # Add open rate
-    if 'Open Rate' in data.columns:
-        fig.add_trace(go.Scatter(
-            x=data['processed_date'],
-            y=data['Open Rate'],
-            mode='lines+markers',
-            name='Open Rate (%)',
-            line=dict(color=COLORS['open'], width=3),
-            marker=dict(size=6)
-        ))
-    
-    # Add bounce rate
-    if 'Bounce Rate' in data.columns:
-        fig.add_trace(go.Scatter(
-            x=data['processed_date'],
-            y=data['Bounce Rate'],
-            mode='lines+markers',
-            name='Bounce Rate (%)',
-            line=dict(color=COLORS['bounce'], width=3),
-            marker=dict(size=6)
-        ))
-    
-    fig.update_layout(
-        title=title,
-        xaxis_title='Date',
-        yaxis_title='Rate (%)',
-        height=CHART_CONFIG['height'],
-        margin=CHART_CONFIG['margin'],
-        plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
-        hovermode='x unified',
-        showlegend=True
     )
     
     return fig
 
 
+@memoize_figure
 def create_metric_gauge(value, title, max_value=100, color=None):
     """
     Create a gauge chart for a single metric
@@ -183,35 +342,37 @@ def create_metric_gauge(value, title, max_value=100, color=None):
     if color is None:
         color = COLORS['primary']
     
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=value,
-        domain={'x': [0, 1], 'y': [0, 1]},
-        title={'text': title},
-        delta={'reference': max_value * 0.8},
-        gauge={
-            'axis': {'range': [None, max_value]},
-            'bar': {'color': color},
-            'steps': [
-                {'range': [0, max_value * 0.5], 'color': "lightgray"},
-                {'range': [max_value * 0.5, max_value * 0.8], 'color': "gray"}
-            ],
-            'threshold': {
-                'line': {'color': "red", 'width': 4},
-                'thickness': 0.75,
-                'value': max_value * 0.9
+    fig = go.Figure(
+        data=go.Indicator(
+            mode="gauge+number+delta",
+            value=value,
+            domain=GAUGE_DOMAIN,
+            title={'text': title},
+            delta={'reference': max_value * 0.8},
+            gauge={
+                'axis': {'range': [None, max_value]},
+                'bar': {'color': color},
+                'steps': [
+                    {'range': [0, max_value * 0.5], 'color': "lightgray"},
+                    {'range': [max_value * 0.5, max_value * 0.8], 'color': "gray"}
+                ],
+                'threshold': {
+                    'line': GAUGE_THRESHOLD_LINE,
+                    'thickness': 0.75,
+                    'value': max_value * 0.9
+                }
             }
-        }
-    ))
-    
-    fig.update_layout(
-        height=200,
-        margin=dict(l=20, r=20, t=40, b=20)
+        ),
+        layout=dict(
+            height=200,
+            margin=PANEL_MARGIN
+        )
     )
     
     return fig
 
 
+@memoize_figure
 def create_volume_bar_chart(data, title="Daily Email Volume"):
     """
     Create a bar chart showing daily email volumes
@@ -224,58 +385,34 @@ def create_volume_bar_chart(data, title="Daily Email Volume"):
         plotly.graph_objects.Figure: Bar chart
     """
     if data.empty:
-        return go.Figure().add_annotation(
-            text="No data available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
+        return NO_DATA_FIGURE
+    
+    # Bars for each event type, sharing a single date array. These stay
+    # separate traces: grouped bars and the legend entries are per trace.
+    x = _date_axis_values(data['processed_date'])
+    fig = go.Figure(
+        data=[
+            go.Bar(x=x, y=data[event].to_numpy(), **trace)
+            for event, trace in VOLUME_BAR_SERIES
+            if event in data.columns
+        ],
+        layout=dict(
+            title=title,
+            xaxis_title='Date',
+            xaxis_type='date',
+            yaxis_title='Number of Emails',
+            height=CHART_CONFIG['height'],
+            margin=CHART_CONFIG['margin'],
+            plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
+            barmode='group',
+            showlegend=True
         )
-    
-    fig = go.Figure()
-    
-    # Add bars for each event type
-    fig.add_trace(go.Bar(
-        x=data['processed_date'],
-        y=data['processed'],
-        name='Processed',
-        marker_color=COLORS['processed']
-    ))
-    
-    fig.add_trace(go.Bar(
-        x=data['processed_date'],
-        y=data['delivered'],
-        name='Delivered',
-        marker_color=COLORS['delivered']
-    ))
-    
-    fig.add_trace(go.Bar(
-        x=data['processed_date'],
-        y=data['open'],
-        name='Opened',
-        marker_color=COLORS['open']
-    ))
-    
-    if 'bounce' in data.columns:
-        fig.add_trace(go.Bar(
-            x=data['processed_date'],
-            y=data['bounce'],
-            name='Bounced',
-            marker_color=COLORS['bounce']
-        ))
-    
-    fig.update_layout(
-        title=title,
-        xaxis_title='Date',
-        yaxis_title='Number of Emails',
-        height=CHART_CONFIG['height'],
-        margin=CHART_CONFIG['margin'],
-        plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
-        barmode='group',
-        showlegend=True
     )
     
     return fig
 
 
+@memoize_figure
 def create_comparison_chart(current_metrics, comparison_metrics, title="Performance Comparison"):
     """
     Create a comparison chart between two sets of metrics
@@ -294,36 +431,36 @@ def create_comparison_chart(current_metrics, comparison_metrics, title="Performa
     current_values = [current_metrics.get(m, 0) for m in metrics]
     comparison_values = [comparison_metrics.get(m, 0) for m in metrics]
     
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        x=metric_labels,
-        y=current_values,
-        name='Current',
-        marker_color=COLORS['primary']
-    ))
-    
-    fig.add_trace(go.Bar(
-        x=metric_labels,
-        y=comparison_values,
-        name='Comparison',
-        marker_color=COLORS['secondary']
-    ))
-    
-    fig.update_layout(
-        title=title,
-        yaxis_title='Rate (%)',
-        height=CHART_CONFIG['height'],
-        margin=CHART_CONFIG['margin'],
-        plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
-        barmode='group',
-        showlegend=True
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=metric_labels,
+                y=current_values,
+                name='Current',
+                marker_color=COLORS['primary']
+            ),
+            go.Bar(
+                x=metric_labels,
+                y=comparison_values,
+                name='Comparison',
+                marker_color=COLORS['secondary']
+            )
+        ],
+        layout=dict(
+            title=title,
+            yaxis_title='Rate (%)',
+            height=CHART_CONFIG['height'],
+            margin=CHART_CONFIG['margin'],
+            plot_bgcolor=CHART_CONFIG['plot_bgcolor'],
+            barmode='group',
+            showlegend=True
+        )
     )
     
     return fig
 
 
-def create_simple_metric_chart(value, title, format_type="number"):
+def create_simple_metric_chart(value, title, format_type="number", return_json=False):
     """
     Create a simple metric display chart
     
@@ -331,6 +468,7 @@ def create_simple_metric_chart(value, title, format_type="number"):
         value (float): Value to display
         title (str): Metric title
         format_type (str): How to format the value
+        return_json (bool): Return the chart's plotly JSON instead of the figure
     
     Returns:
         plotly.graph_objects.Figure: Simple metric chart
@@ -342,13 +480,33 @@ def create_simple_metric_chart(value, title, format_type="number"):
     else:
         display_value = str(value)
     
-    fig = go.Figure()
+    return _build_simple_metric_chart(display_value, title, return_json=return_json)
+
+
+@memoize_figure
+def _build_simple_metric_chart(display_value, title):
+    """
+    Build the simple metric chart for an already formatted value
+    
+    Memoized on the formatted text, so values that display the same share
+    one figure.
+    """
+    fig = go.Figure(
+        layout=dict(
+            height=150,
+            margin=METRIC_MARGIN,
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            xaxis_visible=False,
+            yaxis_visible=False
+        )
+    )
     
     fig.add_annotation(
         text=f"<b>{display_value}</b>",
         x=0.5, y=0.6,
         xref="paper", yref="paper",
-        font=dict(size=30, color=COLORS['primary']),
+        font=METRIC_VALUE_FONT,
         showarrow=False
     )
     
@@ -356,18 +514,8 @@ def create_simple_metric_chart(value, title, format_type="number"):
         text=title,
         x=0.5, y=0.3,
         xref="paper", yref="paper",
-        font=dict(size=16, color=COLORS['secondary']),
+        font=METRIC_TITLE_FONT,
         showarrow=False
     )
     
-    fig.update_layout(
-        height=150,
-        margin=dict(l=0, r=0, t=0, b=0),
-        plot_bgcolor='white',
-        paper_bgcolor='white'
-    )
-    
-    fig.update_xaxes(visible=False)
-    fig.update_yaxes(visible=False)
-    
     return fig
\ No newline at end of file
@@ -0,0 +1,25 @@
+import importlib
+import os
+import sys
+import unittest
+
+DASHBOARD_DIR = os.path.join(os.path.dirname(__file__), "..", "sendgrid_dashbaord")
+sys.path.insert(0, DASHBOARD_DIR)
+
+
+class DashboardImportTest(unittest.TestCase):
+    def test_modules_import(self):
+        for name in ("config", "utils", "data_processor", "visualizations"):
+            with self.subTest(module=name):
+                importlib.import_module(name)
+
+    def test_app_starts(self):
+        from streamlit.testing.v1 import AppTest
+
+        at = AppTest.from_file(os.path.join(DASHBOARD_DIR, "app.py"), default_timeout=30)
+        at.run()
+        self.assertFalse(at.exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import emailRateAutomation as app  # noqa: E402
+
+TIMESTAMPS = {
+    "iso": ["2024-03-01 09:15:00", "2024-03-01 23:59:59", "2024-03-02 00:00:01", "2024-03-13 08:00:00"],
+    "T": ["2024-03-01T09:15:00", "2024-03-01T23:59:59", "2024-03-02T00:00:01", "2024-03-13T08:00:00"],
+    "us": ["03/01/2024 09:15", "03/01/2024 23:59", "03/02/2024 00:00", "03/13/2024 08:00"],
+    "offset": ["2024-03-01T09:15:00-05:00", "2024-03-01T23:59:59-05:00", "2024-03-02T00:00:01-05:00", "2024-03-13T08:00:00-05:00"],
+    "utc": ["2024-03-01T09:15:00Z", "2024-03-01T23:59:59Z", "2024-03-02T00:00:01Z", "2024-03-13T08:00:00Z"],
+}
+
+
+def make_csv(stamps):
+    rows = [
+        ("processed", "m1", stamps[0], "Hello", "a@example.com", "x"),
+        ("delivered", "m1", stamps[1], "", "a@example.com", "x"),
+        ("open", "m1", stamps[2], "", "a@example.com", "x"),
+        ("open", "m1", stamps[2], "", "a@example.com", "x"),
+        ("processed", "m2", stamps[0], "Spring sale", "b@example.com", "y"),
+        ("bounce", "m2", stamps[3], "", "b@example.com", "y"),
+        ("delivered", "m3", stamps[1], "", "c@example.com", "z"),
+        ("processed", "", stamps[0], "No id", "d@example.com", "z"),
+        ("click", "m1", stamps[3], "", "a@example.com", "x"),
+        ("open", "m2", "not a date", "", "b@example.com", "y"),
+    ]
+    lines = ["event,message_id, processed ,subject,email,extra"]
+    lines += [",".join(row) for row in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+@unittest.skipIf(app.pl is None, "polars is not installed")
+class PolarsMatchesPandasTest(unittest.TestCase):
+    def test_equal_frames(self):
+        for name, stamps in TIMESTAMPS.items():
+            with self.subTest(timestamps=name):
+                file_bytes = make_csv(stamps)
+                expected = app.clean_with_pandas(file_bytes)
+                pd.testing.assert_frame_equal(app.clean_with_polars(file_bytes), expected)
+                self.assertEqual(len(expected), 6)
+                self.assertEqual(expected["processed_date"].min(), pd.Timestamp("2024-03-01").date())
+
+    def test_missing_columns(self):
+        file_bytes = b"event,processed\nprocessed,2024-03-01 09:15:00\n"
+        for clean in (app.clean_with_pandas, app.clean_with_polars):
+            with self.subTest(clean=clean.__name__):
+                with self.assertRaises(ValueError):
+                    clean(file_bytes)
+
+
+if __name__ == "__main__":
+    unittest.main()